@@ -0,0 +1,307 @@
+import os
+import re
+import sys
+import time
+import threading
+import types
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+# Size-aware process pool for batch runs. Each window of files is costed from its type,
+# size and an estimated page count, then split into tasks: expensive files run alone, cheap ones are
+# packed together to amortize IPC. Tasks are dispatched largest first so the long PDFs
+# don't end up as stragglers. A worker that overruns its deadline or crashes is replaced,
+# and its batch is retried file by file so only the pathological file is marked failed.
+# Workers must also report ready within startup_timeout, so a hung warm-up can't stall a run.
+#
+# Benchmark cold vs. warm time to first result with: python batch_scheduler.py RESUME_DIR
+
+# (fixed seconds, seconds per byte) by extension, plus seconds per PDF page
+TYPE_COSTS = {
+    '.txt': (0.0005, 2e-8),
+    '.docx': (0.02, 2e-7),
+    '.pdf': (0.005, 1e-8),
+}
+PDF_PAGE_COST = 0.02
+PDF_SCAN_BYTES = 64 * 1024
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+def pdf_page_estimate(path, size):
+    # Count page objects in the first PDF_SCAN_BYTES and scale up to the full size. The PDF
+    # is never parsed here: a file that hangs or crashes MuPDF must only do so in a worker.
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(PDF_SCAN_BYTES)
+    except OSError:
+        return 1
+    pages = len(PDF_PAGE_RE.findall(head))
+    if not pages:
+        # Page objects are often compressed or at the end; assume ~50 KB per page
+        return max(size // 50000, 1)
+    return max(pages * size // max(len(head), 1), 1)
+
+def estimate_cost(path):
+    ext = os.path.splitext(path)[1].lower()
+    fixed, per_byte = TYPE_COSTS.get(ext, TYPE_COSTS['.pdf'])
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return fixed
+    cost = fixed + size * per_byte
+    if ext == '.pdf':
+        cost += pdf_page_estimate(path, size) * PDF_PAGE_COST
+    return cost
+
+def plan_tasks(items, batch_cost=0.25, max_batch=64):
+    # items are (index, path); returns tasks as lists of items, most expensive first
+    costed = sorted(((estimate_cost(path), index, path) for index, path in items), key=lambda c: (-c[0], c[1]))
+    tasks, batch, batch_total = [], [], 0.0
+    for cost, index, path in costed:
+        if cost >= batch_cost:
+            tasks.append([(index, path)])
+            continue
+        batch.append((index, path))
+        batch_total += cost
+        if batch_total >= batch_cost or len(batch) >= max_batch:
+            tasks.append(batch)
+            batch, batch_total = [], 0.0
+    if batch:
+        tasks.append(batch)
+    return tasks
+
+def _worker_main(conn):
+    import resume_batch
+    # Preload extractors and matchers before taking work, then tell the parent we're warm
+    resume_batch.warm_up()
+    conn.send('ready')
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        items, context, fn_name = msg
+        fn = getattr(resume_batch, fn_name)
+        results = []
+        for index, path in items:
+            t0 = time.perf_counter()
+            try:
+                result = fn(path, *context)
+            except Exception as e:
+                result = e
+            results.append((index, result, time.perf_counter() - t0))
+        conn.send(results)
+
+class AdaptiveScheduler:
+    # A long-lived pool: start() once (e.g. per Streamlit server) and reuse it across runs
+    def __init__(self, workers=None, task_timeout=60.0, batch_cost=0.25, max_batch=64, window=256, start_method=None,
+                 startup_timeout=60.0):
+        self.n_workers = workers or os.cpu_count() or 1
+        self.task_timeout = task_timeout
+        self.startup_timeout = startup_timeout
+        self.batch_cost = batch_cost
+        self.max_batch = max_batch
+        self.window = window
+        self.ctx = multiprocessing.get_context(start_method)
+        self.workers = []
+        self.failed = 0
+        # Streamlit sessions run on separate threads; runs take turns on the pool
+        self.lock = threading.Lock()
+
+    def _spawn(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        proc = self.ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        main = sys.modules['__main__']
+        if __name__ != '__main__':
+            # Spawned children re-run the parent's __main__ file. Under `streamlit run` that is the
+            # app script itself, which would start another pool; workers only need this module.
+            sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            proc.start()
+        finally:
+            sys.modules['__main__'] = main
+        child_conn.close()
+        # Until it reports ready, the deadline bounds the worker's start-up
+        return {'proc': proc, 'conn': parent_conn, 'ready': False, 'task': None,
+                'deadline': time.perf_counter() + self.startup_timeout, 'started': None, 'busy': 0.0}
+
+    def _replace(self, worker):
+        worker['proc'].kill()
+        worker['proc'].join()
+        worker['conn'].close()
+        fresh = self._spawn()
+        if worker['started'] is not None:
+            fresh['busy'] = worker['busy'] + time.perf_counter() - worker['started']
+        self.workers[self.workers.index(worker)] = fresh
+
+    def start(self):
+        # Workers warm up in the background; runs only hand work to workers that said 'ready'
+        if not self.workers:
+            self.workers = [self._spawn() for _ in range(self.n_workers)]
+        return self
+
+    def close(self):
+        for worker in self.workers:
+            try:
+                worker['conn'].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            worker['proc'].join(timeout=1)
+            if worker['proc'].is_alive():
+                worker['proc'].kill()
+        self.workers = []
+
+    def extract_texts(self, paths):
+        # Returns the text of each path, or the exception raised while extracting it
+        with self.lock:
+            results = {index: result for index, result, _ in self._run(enumerate(paths), (), 'extract_text_from_file')}
+        return [results[i] for i in range(len(paths))]
+
+    def run(self, items, context, fn_name='score_file'):
+        # Yields (index, result, seconds) as files finish, in completion order.
+        # context is the extra arguments for resume_batch.<fn_name>, e.g. (job_must_haves, weights, ocr).
+        with self.lock:
+            yield from self._run(items, context, fn_name)
+
+    def _failure(self, fn_name, message, error=TimeoutError):
+        if fn_name == 'score_file':
+            from resume_batch import ScoreExplanation
+            return 0, 0, ScoreExplanation.failed(message)
+        return error(message)
+
+    def _run(self, items, context, fn_name):
+        items = iter(items)
+        tasks = deque()
+        exhausted = False
+        startup_failures = 0
+        self.start()
+        self.failed = 0
+        for worker in self.workers:
+            worker['busy'] = 0.0
+        start = time.perf_counter()
+        try:
+            while True:
+                # Plan the next (small) window once the queue runs low. Costing is only a stat and
+                # a bounded read per file, so deadlines and results are checked again promptly.
+                if not exhausted and len(tasks) < self.n_workers:
+                    window = [item for _, item in zip(range(self.window), items)]
+                    exhausted = len(window) < self.window
+                    tasks.extend(plan_tasks(window, self.batch_cost, self.max_batch))
+
+                for worker in self.workers:
+                    if worker['ready'] and worker['task'] is None and tasks:
+                        worker['task'] = tasks.popleft()
+                        worker['started'] = time.perf_counter()
+                        worker['deadline'] = worker['started'] + self.task_timeout
+                        worker['conn'].send((worker['task'], context, fn_name))
+
+                busy = [w for w in self.workers if w['task'] is not None]
+                if not busy and exhausted and not tasks:
+                    break
+                waiting = busy + [w for w in self.workers if not w['ready']]
+
+                deadlines = [w['deadline'] for w in waiting]
+                timeout = max(min(deadlines) - time.perf_counter(), 0) if deadlines else None
+                ready = wait([w['conn'] for w in waiting], timeout)
+                now = time.perf_counter()
+                for worker in waiting:
+                    if worker['conn'] in ready:
+                        try:
+                            results = worker['conn'].recv()
+                        except EOFError:  # the worker died, e.g. a crash inside a PDF library
+                            results = None
+                        if results == 'ready':
+                            worker['ready'] = True
+                            continue
+                        if results is not None:
+                            worker['busy'] += now - worker['started']
+                            worker['task'] = None
+                            yield from results
+                            continue
+                        crashed = True
+                    elif now < worker['deadline']:
+                        continue
+                    else:
+                        crashed = False
+
+                    if worker['task'] is None:
+                        # Died or hung before taking work; give up if workers can't start at all
+                        startup_failures += 1
+                        if startup_failures > 2 * self.n_workers:
+                            raise RuntimeError("Worker processes keep failing during start-up")
+                        what = "exited" if crashed else f"did not report ready within {self.startup_timeout:.0f}s"
+                        print(f"Worker {what} during start-up; replacing it", file=sys.stderr)
+                        self._replace(worker)
+                        continue
+
+                    # Timed out or crashed: replace the worker, then isolate the bad file
+                    task = worker['task']
+                    elapsed = now - worker['started']
+                    self._replace(worker)
+                    if len(task) > 1:
+                        tasks.extendleft([item] for item in reversed(task))
+                    else:
+                        index, path = task[0]
+                        self.failed += 1
+                        if crashed:
+                            print(f"Worker crashed on {path} after {elapsed:.1f}s", file=sys.stderr)
+                            yield index, self._failure(fn_name, "Failed: worker crashed", RuntimeError), elapsed
+                        else:
+                            print(f"Killed worker on {path} after {elapsed:.1f}s (timed out)", file=sys.stderr)
+                            yield index, self._failure(fn_name, "Failed: processing timed out"), elapsed
+        finally:
+            self.report(time.perf_counter() - start)
+
+    def report(self, wall):
+        if wall <= 0 or not self.workers:
+            return
+        busy = [w['busy'] for w in self.workers]
+        per_worker = ' '.join(f"{b / wall:.0%}" for b in busy)
+        print(f"Worker utilization: {sum(busy) / (wall * len(busy)):.0%} overall ({per_worker}); "
+              f"{self.failed} files failed", file=sys.stderr)
+
+def benchmark(resume_dir):
+    # Time to first result from a cold start vs. a warm pool and a warm process
+    import subprocess
+    from resume_batch import list_resume_files, parse_job_description, score_file, warm_up, WARM_UP_TEXT
+
+    paths = [os.path.join(resume_dir, f) for f in list_resume_files(resume_dir)]
+    if not paths:
+        raise SystemExit(f"No resumes found in {resume_dir}")
+    context = (*parse_job_description(WARM_UP_TEXT), False)
+
+    cold_script = ("import time; t0 = time.perf_counter(); import resume_batch as rb; rb.warm_up(); "
+                   f"rb.score_file({paths[0]!r}, *rb.parse_job_description(rb.WARM_UP_TEXT)); "
+                   "print(time.perf_counter() - t0)")
+    out = subprocess.run([sys.executable, '-c', cold_script], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    cold_process = float(out.stdout.strip().splitlines()[-1])
+
+    # Same first file, but in a process that already paid for imports and warm-up
+    warm_up()
+    t0 = time.perf_counter()
+    score_file(paths[0], *context)
+    warm_process = time.perf_counter() - t0
+
+    def first_result(pool, path):
+        t0 = time.perf_counter()
+        list(pool.run([(0, path)], context))
+        return time.perf_counter() - t0
+
+    pool = AdaptiveScheduler(start_method='spawn')
+    try:
+        cold_pool = first_result(pool, paths[0])
+        warm_pool = first_result(pool, paths[-1])
+    finally:
+        pool.close()
+
+    print("Time to first result:")
+    for label, seconds in [("cold process (library imports + first file)", cold_process),
+                           ("warm process", warm_process),
+                           (f"cold pool ({pool.n_workers} workers, spawn + warm-up)", cold_pool),
+                           ("warm pool", warm_pool)]:
+        print(f"  {label:<45} {seconds * 1e3:8.1f} ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        raise SystemExit("Usage: python batch_scheduler.py RESUME_DIR")
+    benchmark(sys.argv[1])
@@ -0,0 +1,761 @@
+import re
+import os
+import sys
+import csv
+import io
+import json
+import heapq
+import hashlib
+import importlib
+import argparse
+import time
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Batch ranking for large resume corpora. The Streamlit GUIs import their scoring from here;
+# extractors import their libraries lazily so text-only batches don't need them.
+#
+# Usage: python resume_batch.py JD_FILE RESUME_DIR [--output ranked.csv] [--checkpoint run.ckpt]
+
+# Predefined list of common technical skills (lowercased for matching)
+common_technical_skills = [
+    'python', 'java', 'c++', 'javascript', 'sql', 'c#', 'ruby', 'go', 'kotlin', 'swift', 'php',
+    'react', 'angular', 'vue.js', 'node.js', 'django', 'flask', 'spring boot', 'asp.net',
+    'aws', 'azure', 'google cloud', 'docker', 'kubernetes', 'jenkins', 'git', 'terraform',
+    'mysql', 'postgresql', 'mongodb', 'redis', 'oracle',
+    'html', 'css', 'typescript', 'rust', 'scala', 'perl',
+    'ansible', 'puppet', 'chef', 'elasticsearch', 'kafka',
+    'android', 'ios', 'flutter', 'react native'
+]
+
+# Degree levels for better matching (enhanced to include variations)
+degree_levels = {
+    'BS': 1, 'BSC': 1, 'BA': 1,
+    'MS': 2, 'MSC': 2, 'MA': 2,
+    'PHD': 3
+}
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# Compiled once at import so worker processes and Streamlit sessions start with them ready
+SKILL_PATTERNS = [(skill.capitalize(), re.compile(r'\b' + re.escape(skill) + r'\b')) for skill in common_technical_skills]
+SOFT_SKILL_PATTERNS = [(s, re.compile(r'\b' + re.escape(s) + r'\b')) for s in ['teamwork', 'communication']]
+EXPERIENCE_RE = re.compile(r'(\d+)\+? years?')
+EDUCATION_RE = re.compile(r'\b(bs|bsc|ba|ms|msc|ma|phd)\b')
+
+def parse_job_description(job_desc):
+    job_desc_lower = job_desc.lower()
+
+    # Extract skills: find mentions of common technical skills
+    skills = sorted({name for name, pattern in SKILL_PATTERNS if pattern.search(job_desc_lower)})
+
+    # Extract experience: find all \d+ years, take the maximum as min required
+    experience_matches = EXPERIENCE_RE.findall(job_desc_lower)
+    experience_years = max([int(x) for x in experience_matches], default=0)
+
+    # Extract education: find degrees, take the highest level
+    edu_matches = EDUCATION_RE.findall(job_desc_lower)
+    edu_levels = [degree_levels.get(edu.upper(), 0) for edu in edu_matches]
+    education_level = max(edu_levels, default=0)
+
+    # Soft skills: find mentions
+    soft_skills = [s for s, pattern in SOFT_SKILL_PATTERNS if pattern.search(job_desc_lower)]
+
+    must_haves = {
+        'skills': skills,
+        'experience_years': experience_years,
+        'education_level': education_level,
+        'soft_skills': soft_skills
+    }
+    weights = {'skills': 60, 'experience': 25, 'education': 10, 'soft_skills': 5}
+    return must_haves, weights
+
+def parse_resume(resume_text):
+    resume_lower = resume_text.lower()
+
+    # Extract skills: same as JD (sorted so reasons are reproducible across runs).
+    # skill_mask has bit i set for common_technical_skills[i], for cheap hard-filter checks.
+    skill_mask = 0
+    for bit, (name, pattern) in enumerate(SKILL_PATTERNS):
+        if pattern.search(resume_lower):
+            skill_mask |= 1 << bit
+    skills = sorted(name for bit, (name, _) in enumerate(SKILL_PATTERNS) if skill_mask >> bit & 1)
+
+    # Extract experience: find all \d+ years, take the maximum
+    experience_matches = EXPERIENCE_RE.findall(resume_lower)
+    experience_years = max([int(x) for x in experience_matches], default=0)
+
+    # Extract education: find degrees, take the highest level
+    edu_matches = EDUCATION_RE.findall(resume_lower)
+    edu_levels = [degree_levels.get(edu.upper(), 0) for edu in edu_matches]
+    education_level = max(edu_levels, default=0)
+
+    # Soft skills: find mentions
+    soft_skills = [s for s, pattern in SOFT_SKILL_PATTERNS if pattern.search(resume_lower)]
+
+    return {
+        'skills': skills,
+        'experience_years': experience_years,
+        'education_level': education_level,
+        'soft_skills': soft_skills,
+        'skill_mask': skill_mask
+    }
+
+# --- Hard filters ---
+# Must-haves that drop a candidate before scoring. Stage 1 is a keyword prescan of the raw
+# text for the required skills only; stage 2 runs after parsing and is just integer and
+# bitmask comparisons. Anything failing either stage is never scored or ranked.
+
+def build_hard_filters(job_must_haves, experience=False, education=False, skills=(), jd_skills=False):
+    # Returns None when nothing is enforced. Each required skill becomes a group of accepted
+    # skills, and a resume needs one skill from every group: the skill itself, or for JD skills
+    # in semantic mode, anything in its skill_sets (so PostgreSQL passes a SQL requirement).
+    groups = [{s.lower()} for s in skills]
+    if jd_skills:
+        accepted_sets = job_must_haves.get('skill_sets')
+        if accepted_sets is None:
+            accepted_sets = [{js.lower()} for js in job_must_haves['skills']]
+        groups.extend(accepted_sets)
+    unknown = set().union(*groups) - set(common_technical_skills)
+    if unknown:
+        raise ValueError(f"Unknown required skills: {', '.join(sorted(unknown))}")
+    group_bits = [sorted(i for i, skill in enumerate(common_technical_skills) if skill in group) for group in groups]
+    # One combined pattern per group, so the prescan is a single search per requirement
+    filters = {
+        'min_years': job_must_haves['experience_years'] if experience else 0,
+        'min_education': job_must_haves['education_level'] if education else 0,
+        'skill_masks': sorted({sum(1 << i for i in bits) for bits in group_bits}),
+        'prescan': [re.compile('|'.join(SKILL_PATTERNS[i][1].pattern for i in bits)) for bits in group_bits]
+    }
+    if not (filters['min_years'] or filters['min_education'] or filters['skill_masks']):
+        return None
+    return filters
+
+def hard_filter_key(filters):
+    return None if filters is None else (filters['min_years'], filters['min_education'], filters['skill_masks'])
+
+def prescan_passes(text_lower, filters):
+    return all(pattern.search(text_lower) for pattern in filters['prescan'])
+
+def features_pass(resume_data, filters):
+    return (resume_data['experience_years'] >= filters['min_years']
+            and resume_data['education_level'] >= filters['min_education']
+            and all(resume_data['skill_mask'] & mask for mask in filters['skill_masks']))
+
+class ScoreExplanation:
+    # Structured breakdown of a score. Nothing is formatted until str() or details() is
+    # called, so the scoring loop only pays for building a few tuples.
+    __slots__ = ('contributions', 'matched_skills', 'missing_skills', 'resume_skills',
+                 'experience_years', 'experience_delta', 'education_level', 'education_delta', 'error')
+
+    def __init__(self, contributions=None, matched_skills=(), missing_skills=(), resume_skills=(),
+                 experience_years=0, experience_delta=0, education_level=0, education_delta=0, error=None):
+        self.contributions = contributions or {}
+        self.matched_skills = tuple(matched_skills)
+        self.missing_skills = tuple(missing_skills)
+        self.resume_skills = tuple(resume_skills)
+        self.experience_years = experience_years
+        self.experience_delta = experience_delta
+        self.education_level = education_level
+        self.education_delta = education_delta
+        self.error = error
+
+    @classmethod
+    def failed(cls, error):
+        return cls(error=error)
+
+    def __str__(self):
+        if self.error:
+            return self.error
+        skills_str = ' and '.join(self.resume_skills) if self.resume_skills else 'no technical'
+        return f"{skills_str} skills and {self.experience_years} years experience"
+
+    def details(self):
+        # Flat columns for tables and CSV export
+        if self.error:
+            return {'Error': self.error}
+        return {
+            'Skills Points': f"{self.contributions['skills']:.1f}",
+            'Experience Points': f"{self.contributions['experience']:.1f}",
+            'Education Points': f"{self.contributions['education']:.1f}",
+            'Soft Skills Points': f"{self.contributions['soft_skills']:.1f}",
+            'Matched JD Skills': ', '.join(self.matched_skills),
+            'Missing JD Skills': ', '.join(self.missing_skills),
+            'Experience Delta (years)': self.experience_delta,
+            'Education Delta (levels)': self.education_delta,
+        }
+
+    def to_json(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_json(cls, values):
+        return cls(*values)
+
+DETAIL_COLUMNS = list(ScoreExplanation(contributions=dict.fromkeys(('skills', 'experience', 'education', 'soft_skills'), 0)).details())
+
+def score_resume(resume_data, job_must_haves, weights):
+    # Each JD skill is met if the resume has a skill accepted for it: the skill itself, or in
+    # semantic mode anything the matcher accepts. Points and matched/missing lists both come from this.
+    accepted_sets = job_must_haves.get('skill_sets')
+    if accepted_sets is None:
+        accepted_sets = [{js.lower()} for js in job_must_haves['skills']]
+    resume_skills = {s.lower() for s in resume_data['skills']}
+    matched = [bool(resume_skills & accepted) for accepted in accepted_sets]
+    skill_match = sum(matched) / len(matched) * weights['skills'] if matched else 0
+
+    exp_match = min(resume_data['experience_years'] / job_must_haves['experience_years'], 1) * weights['experience'] if job_must_haves['experience_years'] > 0 else weights['experience'] if resume_data['experience_years'] > 0 else 0
+
+    if resume_data['education_level'] >= job_must_haves['education_level']:
+        edu_match = weights['education']
+    elif resume_data['education_level'] > 0:
+        edu_match = weights['education'] * 0.5
+    else:
+        edu_match = 0
+
+    soft_match = len(set(resume_data['soft_skills'])) / max(len(job_must_haves['soft_skills']), 1) * weights['soft_skills']
+
+    total = int(skill_match + exp_match + edu_match + soft_match)
+
+    explanation = ScoreExplanation(
+        contributions={'skills': skill_match, 'experience': exp_match, 'education': edu_match, 'soft_skills': soft_match},
+        matched_skills=[js for js, hit in zip(job_must_haves['skills'], matched) if hit],
+        missing_skills=[js for js, hit in zip(job_must_haves['skills'], matched) if not hit],
+        resume_skills=resume_data['skills'],
+        experience_years=resume_data['experience_years'],
+        experience_delta=resume_data['experience_years'] - job_must_haves['experience_years'],
+        education_level=resume_data['education_level'],
+        education_delta=resume_data['education_level'] - job_must_haves['education_level']
+    )
+    return total, explanation
+
+def extract_pdf_pages(file_path):
+    # Returns per-page text and the indices of pages that have images but no text layer
+    try:
+        import fitz  # PyMuPDF
+        doc = fitz.open(file_path)
+        pages, image_only = [], []
+        for i, page in enumerate(doc):
+            text = page.get_text()
+            if not text.strip() and page.get_images():
+                image_only.append(i)
+            pages.append(text)
+        doc.close()
+        return pages, image_only
+    except Exception as e:
+        raise ValueError(f"Failed to extract text from PDF: {e}")
+
+def extract_text_from_pdf(file_path):
+    pages, _ = extract_pdf_pages(file_path)
+    return "".join(pages).strip()
+
+def extract_text_from_docx(file_path):
+    try:
+        from docx import Document
+        doc = Document(file_path)
+        text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+        return text.strip()
+    except Exception as e:
+        raise ValueError(f"Failed to extract text from docx: {e}")
+
+def extract_text_from_txt(file_path):
+    try:
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    except Exception as e:
+        raise ValueError(f"Failed to extract text from txt: {e}")
+
+def extract_text_from_csv(file_path, column_name='description'):
+    try:
+        import pandas as pd
+        df = pd.read_csv(file_path)
+        if column_name in df.columns:
+            return "\n".join(df[column_name].astype(str).dropna())
+        return ""
+    except Exception as e:
+        raise ValueError(f"Failed to extract text from CSV: {e}")
+
+def extract_text_from_file(file_path):
+    try:
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == '.pdf':
+            return extract_text_from_pdf(file_path)
+        elif ext == '.docx':
+            return extract_text_from_docx(file_path)
+        elif ext == '.txt':
+            return extract_text_from_txt(file_path)
+        elif ext == '.csv':
+            return extract_text_from_csv(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {ext}")
+    except Exception as e:
+        raise ValueError(f"Error processing file {file_path}: {e}")
+
+WARM_UP_TEXT = "Skills: Python, SQL\n3 years experience\nBS CS\nteamwork"
+
+def warm_up():
+    # Import the extractor libraries and run the parsers once, so the first real file
+    # doesn't pay for module loading
+    for module in ('fitz', 'docx', 'pandas'):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    score_text(WARM_UP_TEXT, *parse_job_description(WARM_UP_TEXT))
+
+def list_resume_files(resume_dir):
+    # Sorted relative paths give every file a stable ID and position across reruns
+    paths = []
+    for root, _, files in os.walk(resume_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in RESUME_EXTENSIONS:
+                paths.append(os.path.relpath(os.path.join(root, name), resume_dir))
+    return sorted(paths)
+
+def score_text(text, job_must_haves, weights):
+    # Returns (score, experience, explanation), or {'pruned': stage} when a hard filter fails
+    filters = job_must_haves.get('hard_filters')
+    if filters and not prescan_passes(text.lower(), filters):
+        return {'pruned': 'prescan'}
+    resume_data = parse_resume(text)
+    if filters and not features_pass(resume_data, filters):
+        return {'pruned': 'features'}
+    score, explanation = score_resume(resume_data, job_must_haves, weights)
+    return score, resume_data['experience_years'], explanation
+
+def score_file(path, job_must_haves, weights, ocr=False):
+    # Returns score_text's result, or {'image_only': pages} when a scanned PDF needs OCR
+    try:
+        if ocr and path.lower().endswith('.pdf'):
+            pages, image_only = extract_pdf_pages(path)
+            if image_only:
+                return {'image_only': image_only}
+            text = "".join(pages).strip()
+        else:
+            text = extract_text_from_file(path)
+        return score_text(text, job_must_haves, weights)
+    except Exception as e:
+        print(f"Error processing {path}: {e}", file=sys.stderr)
+        return 0, 0, ScoreExplanation.failed("Invalid resume format")
+
+# --- OCR fallback ---
+# Scanned PDFs have pages with images but no text layer. Those documents go to a small
+# pool of worker processes that render the pages and shell out to a locally installed
+# Tesseract, so the text path never waits on OCR or shares PyMuPDF with it. The main
+# process only submits jobs and collects scores. Results are cached by a hash of the PDF bytes.
+
+# Identical PDFs in flight together are OCR'd only once: each cache key maps onto one of these
+# process-shared locks, handed to every OCR worker when it starts
+OCR_LOCK_STRIPES = 64
+_ocr_locks = None
+
+def _init_ocr_worker(locks):
+    global _ocr_locks
+    _ocr_locks = locks
+    # Leave the CPU to the text path whenever both want it
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+def ocr_pdf(file_path, image_only, cache_dir, lang='eng', timeout=None):
+    # timeout bounds the whole document; subprocess.TimeoutExpired is raised when it runs out
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    key = hashlib.sha256(data)
+    key.update(b'\0' + lang.encode('utf-8'))
+    cache_file = os.path.join(cache_dir, key.hexdigest() + '.txt')
+    key_lock = _ocr_locks[int(key.hexdigest()[:8], 16) % len(_ocr_locks)] if _ocr_locks else contextlib.nullcontext()
+
+    with key_lock:
+        # Re-checked under the lock: a duplicate may have finished while we waited
+        if os.path.exists(cache_file):
+            with open(cache_file, encoding='utf-8') as f:
+                return f.read(), True
+
+        import fitz  # PyMuPDF
+        deadline = time.perf_counter() + timeout if timeout else None
+        doc = fitz.open(stream=data, filetype='pdf')
+        try:
+            texts = []
+            for i, page in enumerate(doc):
+                if i in image_only:
+                    remaining = deadline - time.perf_counter() if deadline else None
+                    if remaining is not None and remaining <= 0:
+                        raise subprocess.TimeoutExpired('tesseract', timeout)
+                    png = page.get_pixmap(dpi=300).tobytes('png')
+                    result = subprocess.run(['tesseract', 'stdin', 'stdout', '-l', lang], input=png, timeout=remaining,
+                                            capture_output=True, check=True, env={**os.environ, 'OMP_THREAD_LIMIT': '1'})
+                    texts.append(result.stdout.decode('utf-8', errors='replace'))
+                else:
+                    texts.append(page.get_text())
+        finally:
+            doc.close()
+        text = "".join(texts).strip()
+        os.makedirs(cache_dir, exist_ok=True)
+        atomic_write(cache_file, text.encode('utf-8'))
+        return text, False
+
+def ocr_score(file_path, image_only, cache_dir, lang, timeout, job_must_haves, weights):
+    # Runs in an OCR worker: OCR the document and score it there. Returns (result, cache hit).
+    try:
+        text, cached = ocr_pdf(file_path, image_only, cache_dir, lang, timeout)
+        return score_text(text, job_must_haves, weights), cached
+    except subprocess.TimeoutExpired:
+        print(f"OCR timed out on {file_path} after {timeout:.0f}s", file=sys.stderr)
+        return (0, 0, ScoreExplanation.failed("Failed: OCR timed out")), False
+    except Exception as e:
+        print(f"Error running OCR on {file_path}: {e}", file=sys.stderr)
+        return (0, 0, ScoreExplanation.failed("Invalid resume format")), False
+
+class OCRQueue:
+    def __init__(self, workers=2, cache_dir='.ocr_cache', lang='eng', timeout=60.0):
+        ctx = multiprocessing.get_context('spawn')
+        locks = [ctx.Lock() for _ in range(OCR_LOCK_STRIPES)]
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                            initializer=_init_ocr_worker, initargs=(locks,))
+        self.cache_dir = cache_dir
+        self.lang = lang
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.docs = 0
+        self.cache_hits = 0
+        self.first_submit = None
+        self.last_done = None
+
+    @staticmethod
+    def available():
+        return shutil.which('tesseract') is not None
+
+    def submit(self, file_path, image_only, job_must_haves, weights):
+        # Returns a future for score_text's result on the OCR'd text
+        if self.first_submit is None:
+            self.first_submit = time.perf_counter()
+        result = Future()
+        job = self.executor.submit(ocr_score, file_path, image_only, self.cache_dir, self.lang, self.timeout,
+                                   job_must_haves, weights)
+        job.add_done_callback(lambda job: self._done(job, file_path, result))
+        return result
+
+    def _done(self, job, file_path, result):
+        try:
+            score, cached = job.result()
+        except Exception as e:  # e.g. the worker process died
+            print(f"Error running OCR on {file_path}: {e}", file=sys.stderr)
+            score, cached = (0, 0, ScoreExplanation.failed("Invalid resume format")), False
+        with self.lock:
+            self.docs += 1
+            self.cache_hits += cached
+            self.last_done = time.perf_counter()
+        result.set_result(score)
+
+    def elapsed(self):
+        return (self.last_done - self.first_submit) if self.docs else 0.0
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+# --- Checkpointing ---
+# A checkpoint is a small JSON file replaced atomically every `checkpoint_every` records.
+# Files can finish out of order, so it stores the prefix of the file list that is fully
+# handled plus the indices recorded past it (at most a scheduler window or so), and either
+# the partial top-K heap or, for full rankings, the committed length of an append-only
+# journal of scored records. A scanned PDF counts as handled once it is queued for OCR, so
+# slow OCR can't hold the prefix back; until its score is recorded it is kept in a separate
+# OCR-pending list and re-queued on resume. That list is bounded by the OCR backlog, not by
+# the corpus, so overhead stays flat.
+
+def run_fingerprint(job_desc, file_ids, top_k, semantic=False, filter_key=None, ocr_lang=None):
+    # ocr_lang is None when OCR is off: resuming with OCR switched on, off or to another
+    # language would score the remaining scanned PDFs differently
+    h = hashlib.sha256()
+    h.update(job_desc.encode('utf-8'))
+    h.update(f"{top_k}:{semantic}:{filter_key}:{ocr_lang}".encode('utf-8'))
+    for file_id in file_ids:
+        h.update(b'\0' + file_id.encode('utf-8'))
+    return h.hexdigest()
+
+def atomic_write(path, data):
+    # A unique temp file per call, so concurrent writers of the same path can't clobber each other
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_checkpoint(checkpoint_path, fingerprint):
+    try:
+        with open(checkpoint_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get('fingerprint') != fingerprint:
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different job description, file list or options")
+    return state
+
+def save_checkpoint(checkpoint_path, fingerprint, done, last_id, recorded_after, heap, journal_offset, pruned, ocr_pending=()):
+    state = {
+        'fingerprint': fingerprint,
+        'done': done,
+        'last_id': last_id,
+        'recorded_after': recorded_after,
+        'ocr_pending': ocr_pending,
+        'heap': heap,
+        'pruned': pruned,
+        'journal_offset': journal_offset
+    }
+    atomic_write(checkpoint_path, json.dumps(state, separators=(',', ':')).encode('utf-8'))
+
+def rank_records(records):
+    # Score descending, then experience descending, then input order (what a stable sort gives)
+    return sorted(records, key=lambda r: (-r[1], -r[2], r[0]))
+
+def score_files_inline(items, job_must_haves, weights, ocr):
+    for index, path in items:
+        t0 = time.perf_counter()
+        result = score_file(path, job_must_haves, weights, ocr)
+        yield index, result, time.perf_counter() - t0
+
+def run_batch(job_desc, file_ids, resume_dir='.', top_k=None, checkpoint_path=None, checkpoint_every=1000,
+              ocr_queue=None, matcher=None, scheduler=None, require=None):
+    job_must_haves, weights = parse_job_description(job_desc)
+    if matcher:
+        job_must_haves['skill_sets'] = matcher.expand_requirements(job_must_haves['skills'])
+    # require holds build_hard_filters options, e.g. {'experience': True, 'skills': ['python']}
+    hard_filters = build_hard_filters(job_must_haves, **(require or {}))
+    if hard_filters:
+        job_must_haves['hard_filters'] = hard_filters
+    fingerprint = run_fingerprint(job_desc, file_ids, top_k, matcher is not None, hard_filter_key(hard_filters),
+                                  ocr_queue.lang if ocr_queue else None)
+
+    # Records are (index, score, experience, explanation, file_id). Every index below `done`
+    # is handled; `recorded` holds the ones above it that finished early. Scanned PDFs are
+    # handled when queued for OCR and stay in `ocr_pending` until their record is written.
+    done, recorded, ocr_pending, heap, journal = 0, set(), set(), [], None
+    pruned = {'prescan': 0, 'features': 0}
+    journal_path = f"{checkpoint_path}.journal" if checkpoint_path else None
+    state = load_checkpoint(checkpoint_path, fingerprint) if checkpoint_path else None
+    if state:
+        done = state['done']
+        if done and file_ids[done - 1] != state['last_id']:
+            raise ValueError(f"Checkpoint {checkpoint_path} does not match the file list")
+        recorded = set(state['recorded_after'])
+        ocr_pending = set(state.get('ocr_pending', ()))
+        pruned = state['pruned']
+        heap = [(score, experience, neg_index, ScoreExplanation.from_json(explanation), file_id)
+                for score, experience, neg_index, explanation, file_id in state['heap']]
+        processed = done + len(recorded) - len(ocr_pending)
+        print(f"Resuming from checkpoint: {processed}/{len(file_ids)} files already processed", file=sys.stderr)
+    if journal_path and top_k is None:
+        journal = open(journal_path, 'r+b' if state else 'w+b')
+        # Drop anything written after the last checkpoint; those files get re-scored
+        journal.truncate(state['journal_offset'] if state else 0)
+        journal.seek(0, os.SEEK_END)
+
+    records = []
+    since_checkpoint = 0
+    checkpoint_time = 0.0
+    first_result = None
+
+    def mark_handled(index):
+        nonlocal done
+        recorded.add(index)
+        while done in recorded:
+            recorded.remove(done)
+            done += 1
+
+    def add_record(index, result):
+        nonlocal since_checkpoint, checkpoint_time, first_result
+        if first_result is None:
+            first_result = time.perf_counter() - start
+        file_id = file_ids[index]
+        if isinstance(result, dict):
+            # Dropped by a hard filter: counts as done but is never ranked
+            pruned[result['pruned']] += 1
+        elif top_k is not None:
+            score, experience, explanation = result
+            # Min-heap on (score, experience, -index) keeps exactly the K best in ranking order
+            entry = (score, experience, -index, explanation, file_id)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        elif journal:
+            score, experience, explanation = result
+            journal.write(json.dumps((index, score, experience, explanation.to_json(), file_id), separators=(',', ':')).encode('utf-8') + b'\n')
+        else:
+            score, experience, explanation = result
+            records.append((index, score, experience, explanation, file_id))
+
+        if index in ocr_pending:
+            ocr_pending.remove(index)
+        else:
+            mark_handled(index)
+        since_checkpoint += 1
+        if checkpoint_path and since_checkpoint >= checkpoint_every:
+            t0 = time.perf_counter()
+            journal_offset = 0
+            if journal:
+                journal.flush()
+                os.fsync(journal.fileno())
+                journal_offset = journal.tell()
+            save_checkpoint(checkpoint_path, fingerprint, done, file_ids[done - 1] if done else None,
+                            sorted(recorded), [(*entry[:3], entry[3].to_json(), entry[4]) for entry in heap], journal_offset, pruned,
+                            sorted(ocr_pending))
+            checkpoint_time += time.perf_counter() - t0
+            since_checkpoint = 0
+
+    # OCR results arrive on the executor's thread; the main loop drains them so only it touches the state
+    pending = {}
+    completed = queue.SimpleQueue()
+
+    def drain_ocr():
+        while not completed.empty():
+            index = completed.get()
+            add_record(index, pending.pop(index).result())
+
+    start = time.perf_counter()
+    todo = [(index, os.path.join(resume_dir, file_ids[index]))
+            for index in sorted(ocr_pending | (set(range(done, len(file_ids))) - recorded))]
+    context = (job_must_haves, weights, ocr_queue is not None)
+    results = scheduler.run(todo, context) if scheduler else score_files_inline(todo, *context)
+
+    text_docs, text_time = 0, 0.0
+    pruned_docs = {'prescan': 0, 'features': 0}
+    pruned_time = {'prescan': 0.0, 'features': 0.0}
+    for index, result, seconds in results:
+        if isinstance(result, dict) and 'image_only' in result:
+            path = os.path.join(resume_dir, file_ids[index])
+            future = ocr_queue.submit(path, result['image_only'], job_must_haves, weights)
+            pending[index] = future
+            future.add_done_callback(lambda _, index=index: completed.put(index))
+            # Re-queued pending documents from a resumed run are already counted as handled
+            if index not in ocr_pending:
+                ocr_pending.add(index)
+                mark_handled(index)
+        else:
+            text_time += seconds
+            text_docs += 1
+            if isinstance(result, dict):
+                pruned_docs[result['pruned']] += 1
+                pruned_time[result['pruned']] += seconds
+            add_record(index, result)
+        drain_ocr()
+
+    # Wait for the OCR stragglers
+    for index in sorted(pending):
+        pending[index].result()
+    drain_ocr()
+    elapsed = time.perf_counter() - start
+
+    if top_k is not None:
+        records = [(-neg_index, score, experience, explanation, file_id) for score, experience, neg_index, explanation, file_id in heap]
+    elif journal:
+        journal.seek(0)
+        records = []
+        for line in journal:
+            index, score, experience, explanation, file_id = json.loads(line)
+            records.append((index, score, experience, ScoreExplanation.from_json(explanation), file_id))
+        journal.close()
+    ranked = rank_records(records)
+    if top_k is not None:
+        ranked = ranked[:top_k]
+
+    if first_result is not None:
+        print(f"Time to first result: {first_result:.3f}s", file=sys.stderr)
+    if text_time > 0:
+        print(f"Text path: {text_docs} docs in {text_time:.3f}s of worker time ({text_docs / text_time:.1f} docs/s)", file=sys.stderr)
+    if ocr_queue and ocr_queue.docs:
+        ocr_time = ocr_queue.elapsed()
+        print(f"OCR path: {ocr_queue.docs} docs in {ocr_time:.3f}s ({ocr_queue.docs / max(ocr_time, 1e-9):.1f} docs/s, "
+              f"{ocr_queue.cache_hits} cache hits)", file=sys.stderr)
+    if hard_filters:
+        # Estimated saving: each pruned file would otherwise have cost as much as an average scored one
+        scored_docs = text_docs - sum(pruned_docs.values())
+        avg_scored = (text_time - sum(pruned_time.values())) / scored_docs if scored_docs else 0.0
+        saved = sum(pruned_docs[stage] * avg_scored - pruned_time[stage] for stage in pruned_docs)
+        print(f"Hard filters: pruned {pruned['prescan']} at keyword prescan and {pruned['features']} at parsed features "
+              f"of {len(file_ids)}; about {max(saved, 0.0):.3f}s of scoring saved", file=sys.stderr)
+    if elapsed > 0 and checkpoint_path:
+        print(f"Checkpoint overhead: {checkpoint_time:.3f}s of {elapsed:.3f}s ({checkpoint_time / elapsed:.1%})", file=sys.stderr)
+    return ranked
+
+def write_ranking(ranked, output_path):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(["Rank", "Resume", "Score", "Reason", *DETAIL_COLUMNS])
+    for rank, (_, score, _, explanation, file_id) in enumerate(ranked, 1):
+        details = explanation.details()
+        writer.writerow([rank, file_id, f"{score}/100", explanation, *(details.get(c, '') for c in DETAIL_COLUMNS)])
+    atomic_write(output_path, buf.getvalue().encode('utf-8'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank a directory of resumes against a job description.")
+    parser.add_argument('job_desc', help="JD file (txt, pdf, docx or csv)")
+    parser.add_argument('resume_dir', help="Directory of resumes (pdf, docx or txt)")
+    parser.add_argument('--output', default='ranked_resumes.csv')
+    parser.add_argument('--top-k', type=int, default=None, help="Only keep the K best matches")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file; rerun with the same path to resume")
+    parser.add_argument('--checkpoint-every', type=int, default=1000)
+    parser.add_argument('--ocr-workers', type=int, default=2, help="Concurrent Tesseract jobs for scanned PDFs (0 disables OCR)")
+    parser.add_argument('--ocr-cache', default='.ocr_cache')
+    parser.add_argument('--ocr-lang', default='eng')
+    parser.add_argument('--semantic', action='store_true', help="Match skills by embedding similarity instead of substrings (needs numpy)")
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes for size-aware scheduling (0 runs in-process)")
+    parser.add_argument('--task-timeout', type=float, default=60.0, help="Seconds before a stuck file (or its OCR) is killed and marked failed")
+    parser.add_argument('--require-experience', action='store_true', help="Drop resumes below the JD's minimum years")
+    parser.add_argument('--require-education', action='store_true', help="Drop resumes below the JD's degree level")
+    parser.add_argument('--require-jd-skills', action='store_true', help="Drop resumes missing any skill the JD mentions")
+    parser.add_argument('--require-skill', action='append', default=[], type=str.lower, choices=common_technical_skills,
+                        metavar='SKILL', help="Drop resumes missing this skill (repeatable; any skill from the taxonomy)")
+    args = parser.parse_args()
+    require = {'experience': args.require_experience, 'education': args.require_education,
+               'skills': args.require_skill, 'jd_skills': args.require_jd_skills}
+
+    scheduler = None
+    if args.workers > 0:
+        from batch_scheduler import AdaptiveScheduler
+        scheduler = AdaptiveScheduler(args.workers, args.task_timeout)
+
+    matcher = None
+    if args.semantic:
+        from semantic_skills import SkillMatcher
+        matcher = SkillMatcher(common_technical_skills)
+
+    ocr_queue = None
+    if args.ocr_workers > 0:
+        if OCRQueue.available():
+            ocr_queue = OCRQueue(args.ocr_workers, args.ocr_cache, args.ocr_lang, args.task_timeout)
+        else:
+            print("tesseract not found; scanned PDFs will be scored without OCR", file=sys.stderr)
+
+    job_desc = extract_text_from_file(args.job_desc)
+    file_ids = list_resume_files(args.resume_dir)
+    try:
+        ranked = run_batch(job_desc, file_ids, args.resume_dir, args.top_k, args.checkpoint, args.checkpoint_every, ocr_queue, matcher, scheduler, require)
+    finally:
+        if ocr_queue:
+            ocr_queue.shutdown()
+        if scheduler:
+            scheduler.close()
+    write_ranking(ranked, args.output)
+
+    # The run finished, so its checkpoint is no longer needed
+    if args.checkpoint:
+        for path in (args.checkpoint, f"{args.checkpoint}.journal"):
+            if os.path.exists(path):
+                os.remove(path)
+    print(f"Ranked {len(file_ids)} resumes; wrote {len(ranked)} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
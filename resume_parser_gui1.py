@@ -1,173 +1,74 @@
-import re
 import streamlit as st
 import tempfile
-import fitz  # PyMuPDF
-from docx import Document
-import pandas as pd
 import os
+import time
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Predefined list of common technical skills (lowercased for matching)
-common_technical_skills = [
-    'python', 'java', 'c++', 'javascript', 'sql', 'c#', 'ruby', 'go', 'kotlin', 'swift', 'php',
-    'react', 'angular', 'vue.js', 'node.js', 'django', 'flask', 'spring boot', 'asp.net',
-    'aws', 'azure', 'google cloud', 'docker', 'kubernetes', 'jenkins', 'git', 'terraform',
-    'mysql', 'postgresql', 'mongodb', 'redis', 'oracle',
-    'html', 'css', 'typescript', 'rust', 'scala', 'perl',
-    'ansible', 'puppet', 'chef', 'elasticsearch', 'kafka',
-    'android', 'ios', 'flutter', 'react native'
-]
+from resume_batch import (common_technical_skills, parse_job_description, parse_resume, score_resume, ScoreExplanation,
+                          build_hard_filters, prescan_passes, features_pass)
+from batch_scheduler import AdaptiveScheduler
 
-# Degree levels for better matching (enhanced to include variations)
-degree_levels = {
-    'BS': 1, 'BSC': 1, 'BA': 1,
-    'MS': 2, 'MSC': 2, 'MA': 2,
-    'PHD': 3
-}
+@st.cache_resource
+def get_worker_pool():
+    # One pool per server, shared by all sessions. Workers preload PyMuPDF, python-docx,
+    # pandas and the compiled skill matchers, so the first upload doesn't pay for them.
+    return AdaptiveScheduler(workers=min(4, os.cpu_count() or 1), start_method='spawn').start()
 
-def parse_job_description(job_desc):
-    job_desc_lower = job_desc.lower()
-    
-    # Extract skills: find mentions of common technical skills
-    skills = set()
-    for skill in common_technical_skills:
-        if re.search(r'\b' + re.escape(skill) + r'\b', job_desc_lower):
-            skills.add(skill.capitalize())
-    
-    skills = list(skills)
-    
-    # Extract experience: find all \d+ years, take the maximum as min required
-    experience_matches = re.findall(r'(\d+)\+? years?', job_desc_lower)
-    experience_years = max([int(x) for x in experience_matches], default=0)
-    
-    # Extract education: find degrees, take the highest level
-    edu_matches = re.findall(r'\b(bs|bsc|ba|ms|msc|ma|phd)\b', job_desc_lower)
-    edu_levels = [degree_levels.get(edu.upper(), 0) for edu in edu_matches]
-    education_level = max(edu_levels, default=0)
-    
-    # Soft skills: find mentions (fixed to match JD exactly)
-    soft_possible = ['teamwork', 'communication']
-    soft_skills = [s for s in soft_possible if re.search(r'\b' + re.escape(s) + r'\b', job_desc_lower)]
-    
-    must_haves = {
-        'skills': skills,
-        'experience_years': experience_years,
-        'education_level': education_level,
-        'soft_skills': soft_skills
-    }
-    weights = {'skills': 60, 'experience': 25, 'education': 10, 'soft_skills': 5}
-    return must_haves, weights
-
-def parse_resume(resume_text):
-    resume_lower = resume_text.lower()
-    
-    # Extract skills: same as JD
-    skills = set()
-    for skill in common_technical_skills:
-        if re.search(r'\b' + re.escape(skill) + r'\b', resume_lower):
-            skills.add(skill.capitalize())
-    
-    skills = list(skills)
-    
-    # Extract experience: find all \d+ years, take the maximum
-    experience_matches = re.findall(r'(\d+)\+? years?', resume_lower)
-    experience_years = max([int(x) for x in experience_matches], default=0)
-    
-    # Extract education: find degrees, take the highest level
-    edu_matches = re.findall(r'\b(bs|bsc|ba|ms|msc|ma|phd)\b', resume_lower)
-    edu_levels = [degree_levels.get(edu.upper(), 0) for edu in edu_matches]
-    education_level = max(edu_levels, default=0)
-    
-    # Soft skills: find mentions
-    soft_possible = ['teamwork', 'communication']
-    soft_skills = [s for s in soft_possible if re.search(r'\b' + re.escape(s) + r'\b', resume_lower)]
-    
-    return {
-        'skills': skills,
-        'experience_years': experience_years,
-        'education_level': education_level,
-        'soft_skills': soft_skills
-    }
+worker_pool = get_worker_pool()
 
-def score_resume(resume_data, job_must_haves, weights):
-    if job_must_haves['skills']:
-        skill_match = sum(1 for s in resume_data['skills'] if any(s.lower() in js.lower() for js in job_must_haves['skills'])) / len(job_must_haves['skills']) * weights['skills']
-    else:
-        skill_match = 0
-    
-    exp_match = min(resume_data['experience_years'] / job_must_haves['experience_years'], 1) * weights['experience'] if job_must_haves['experience_years'] > 0 else weights['experience'] if resume_data['experience_years'] > 0 else 0
-    
-    if resume_data['education_level'] >= job_must_haves['education_level']:
-        edu_match = weights['education']
-    elif resume_data['education_level'] > 0:
-        edu_match = weights['education'] * 0.5
-    else:
-        edu_match = 0
-    
-    soft_match = len(set(resume_data['soft_skills'])) / max(len(job_must_haves['soft_skills']), 1) * weights['soft_skills']
-    
-    total = int(skill_match + exp_match + edu_match + soft_match)
-    
-    skills_str = ' and '.join(resume_data['skills']) if resume_data['skills'] else 'no technical'
-    return total, f"{skills_str} skills and {resume_data['experience_years']} years experience"
-
-def run_agent(job_desc, resumes):
+def run_agent(job_desc, resumes, require=None):
     job_must_haves, weights = parse_job_description(job_desc)
+    hard_filters = build_hard_filters(job_must_haves, **(require or {}))
     scored_resumes = []
+    pruned = {'prescan': 0, 'features': 0}
+    pruned_time = {'prescan': 0.0, 'features': 0.0}
+    scored_time = 0.0
     for i, resume in enumerate(resumes, 1):
+        t0 = time.perf_counter()
         try:
+            # Hard filters drop candidates before the full parse and scoring
+            if hard_filters and not prescan_passes(resume.lower(), hard_filters):
+                pruned['prescan'] += 1
+                pruned_time['prescan'] += time.perf_counter() - t0
+                continue
             resume_data = parse_resume(resume)
-            score, reason = score_resume(resume_data, job_must_haves, weights)
-            scored_resumes.append((i, score, reason))
+            if hard_filters and not features_pass(resume_data, hard_filters):
+                pruned['features'] += 1
+                pruned_time['features'] += time.perf_counter() - t0
+                continue
+            score, explanation = score_resume(resume_data, job_must_haves, weights)
+            scored_resumes.append((i, score, explanation))
         except Exception as e:
             st.warning(f"Error processing Resume {i}: {e}")
-            scored_resumes.append((i, 0, "Invalid resume format"))
-    scored_resumes.sort(key=lambda x: (-x[1], -int(re.search(r'(\d+) years', x[2]).group(1)) if re.search(r'(\d+) years', x[2]) else 0))
-    return scored_resumes
-
-def extract_text_from_pdf(file_path):
-    try:
-        doc = fitz.open(file_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text.strip()
-    except Exception as e:
-        raise ValueError(f"Failed to extract text from PDF: {e}")
-
-def extract_text_from_docx(file_path):
+            scored_resumes.append((i, 0, ScoreExplanation.failed("Invalid resume format")))
+        scored_time += time.perf_counter() - t0
+    scored_resumes.sort(key=lambda x: (-x[1], -x[2].experience_years))
+    # Estimated saving: each pruned resume would otherwise have cost as much as an average scored one
+    avg_scored = scored_time / len(scored_resumes) if scored_resumes else 0.0
+    saved = sum(pruned[stage] * avg_scored - pruned_time[stage] for stage in pruned)
+    return scored_resumes, pruned, max(saved, 0.0)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def extract_uploads(uploads):
+    # uploads is a tuple of (name, bytes). Cached on content, so reruns (e.g. selecting a
+    # result row) don't re-extract. Returns ([(text, error)], seconds) with one of each pair None.
+    tmp_paths = []
+    for name, data in uploads:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=name.lower()) as tmp:
+            tmp.write(data)
+            tmp_paths.append(tmp.name)
+    t0 = time.perf_counter()
     try:
-        doc = Document(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-        return text.strip()
-    except Exception as e:
-        raise ValueError(f"Failed to extract text from docx: {e}")
-
-def extract_text_from_csv(file_path, column_name='description'):
-    try:
-        df = pd.read_csv(file_path)
-        if column_name in df.columns:
-            return "\n".join(df[column_name].astype(str).dropna())
-        return ""
-    except Exception as e:
-        raise ValueError(f"Failed to extract text from CSV: {e}")
-
-def extract_text_from_file(file_path):
-    try:
-        ext = os.path.splitext(file_path)[1].lower()
-        st.write(f"Processing file: {file_path} with extension: {ext}")  # Debug logging
-        if ext == '.pdf':
-            return extract_text_from_pdf(file_path)
-        elif ext in ['.docx', '.DOCX']:  # Explicitly handle both cases
-            return extract_text_from_docx(file_path)
-        elif ext == '.csv':
-            return extract_text_from_csv(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {ext}")
-    except Exception as e:
-        raise ValueError(f"Error processing file {file_path}: {e}")
+        results = worker_pool.extract_texts(tmp_paths)
+    finally:
+        for tmp_path in tmp_paths:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    elapsed = time.perf_counter() - t0
+    return [(None, str(r)) if isinstance(r, Exception) else (r, None) for r in results], elapsed
 
 # Streamlit app
 st.title("Resume Parser GUI")
@@ -182,21 +83,13 @@ else:
     st.caption("Supported formats: CSV, PDF, DOCX")
     jd_file = st.file_uploader("Upload JD File (CSV, PDF or DOCX)", type=['csv', 'pdf', 'docx', 'DOCX'])
     if jd_file:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=jd_file.name.lower()) as tmp:
-            tmp.write(jd_file.read())
-            tmp_path = tmp.name
-        try:
-            job_desc = extract_text_from_file(tmp_path)
+        [(job_desc, error)], _ = extract_uploads(((jd_file.name, jd_file.getvalue()),))
+        if error:
+            st.error(f"Error loading JD file {jd_file.name}: {error}")
+            job_desc = ""
+        else:
             st.success(f"JD loaded successfully from {jd_file.name}!")
             st.text_area("Extracted JD Text", job_desc, height=200, disabled=True)
-        except Exception as e:
-            st.error(f"Error loading JD file {jd_file.name}: {e}")
-            job_desc = ""
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except Exception as e:
-                st.warning(f"Failed to clean up temp file for JD: {e}")
     else:
         job_desc = ""
 
@@ -216,43 +109,73 @@ else:
     st.caption("Supported formats: PDF, DOCX")
     resume_files = st.file_uploader("Upload Multiple Resumes (PDF or Word)", type=['pdf', 'docx', 'DOCX'], accept_multiple_files=True)
     if resume_files:
-        for file in resume_files:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file.name.lower()) as tmp:
-                tmp.write(file.read())
-                tmp_path = tmp.name
-            try:
-                st.write(f"Attempting to process resume: {file.name} at {tmp_path}")  # Debug
-                resume_text = extract_text_from_file(tmp_path)
-                resumes.append(resume_text)
+        # Extract all uploads in one go on the warm pool
+        results, elapsed = extract_uploads(tuple((file.name, file.getvalue()) for file in resume_files))
+        st.caption(f"Extracted {len(resume_files)} files in {elapsed:.2f}s")
+        for file, (text, error) in zip(resume_files, results):
+            if error:
+                st.warning(f"Error loading resume {file.name}: {error}")
+            else:
+                resumes.append(text)
                 resume_names.append(file.name)
-            except Exception as e:
-                st.warning(f"Error loading resume {file.name}: {e}")
-            finally:
-                try:
-                    os.unlink(tmp_path)
-                except Exception as e:
-                    st.warning(f"Failed to clean up temp file for {file.name}: {e}")
+
+# Hard Filters Section
+with st.expander("Hard Filters (drop resumes before scoring)"):
+    require = {
+        'experience': st.checkbox("Require the JD's minimum years of experience"),
+        'education': st.checkbox("Require the JD's degree level"),
+        'jd_skills': st.checkbox("Require every skill mentioned in the JD"),
+        'skills': st.multiselect("Required skills", common_technical_skills),
+    }
+
+# Results from earlier runs only stay on screen while the inputs they were computed from do
+inputs_key = hash((job_desc, tuple(resumes), tuple(resume_names), repr(require)))
+if st.session_state.get('results_key') != inputs_key:
+    for key in ('scored_resumes', 'pruned', 'filter_saved', 'resume_names', 'ranking_time', 'results_key'):
+        st.session_state.pop(key, None)
 
 # Run Button
 if st.button("Run Parser", disabled=not (job_desc and resumes)):
     with st.spinner("Processing resumes..."):
-        scored_resumes = run_agent(job_desc, resumes)
-    
+        t0 = time.perf_counter()
+        # Kept in session state so selecting rows (which reruns the script) doesn't drop the results
+        st.session_state['scored_resumes'], st.session_state['pruned'], st.session_state['filter_saved'] = run_agent(job_desc, resumes, require)
+        st.session_state['resume_names'] = resume_names
+        st.session_state['ranking_time'] = time.perf_counter() - t0
+        st.session_state['results_key'] = inputs_key
+
+if 'scored_resumes' in st.session_state:
+    scored_resumes = st.session_state['scored_resumes']
+    resume_names = st.session_state['resume_names']
+
     # Display Output
     st.header("Ranked Resumes")
+    st.caption(f"Ranked {len(scored_resumes)} resumes in {st.session_state['ranking_time'] * 1e3:.1f} ms")
+    pruned = st.session_state['pruned']
+    if any(pruned.values()):
+        st.caption(f"Hard filters dropped {pruned['prescan']} resumes at the keyword prescan and "
+                   f"{pruned['features']} after parsing, saving about {st.session_state['filter_saved'] * 1e3:.1f} ms of scoring")
     if scored_resumes:
         data = []
-        for rank, (num, score, reason) in enumerate(scored_resumes, 1):
+        labels = []
+        for rank, (num, score, explanation) in enumerate(scored_resumes, 1):
             filename = resume_names[num - 1] if num <= len(resume_names) else f"Resume {num}"
-            data.append({"Rank": rank, "Resume": filename, "Score": f"{score}/100", "Reason": reason})
-        
+            labels.append(filename)
+            data.append({"Rank": rank, "Resume": filename, "Score": f"{score}/100", "Reason": str(explanation)})
+
         st.subheader("Results Table")
-        st.dataframe(data, use_container_width=True)
-        
+        st.caption("Select rows to see their score breakdown.")
+        event = st.dataframe(data, use_container_width=True, on_select="rerun", selection_mode="multi-row")
+
+        # Only the selected rows pay for rendering their breakdown
+        for row in event.selection.rows:
+            num, score, explanation = scored_resumes[row]
+            with st.expander(f"{labels[row]} - {score}/100", expanded=True):
+                st.table([{"Component": k, "Value": str(v)} for k, v in explanation.details().items()])
+
         st.subheader("Score Visualization")
         scores = [score for _, score, _ in scored_resumes]
-        labels = [resume_names[num - 1] if num <= len(resume_names) else f"Resume {num}" for num, _, _ in scored_resumes]
-        
+
         fig, ax = plt.subplots()
         sns.barplot(x=scores, y=labels, ax=ax, palette='Blues_d')
         ax.set_xlabel("Score (out of 100)")
@@ -0,0 +1,146 @@
+import sys
+import time
+
+# Optional semantic skill matching. Every taxonomy skill gets a vector over the taxonomy
+# itself: a weight on its own dimension and on each skill it implies, directly or through a
+# chain (React Native -> React -> JavaScript), L2-normalized and stored as a float16 matrix.
+# A JD requirement's vector is the unit vector on its own dimension, so its cosine with a skill
+# is non-zero exactly when that skill implies it. Candidates come from an inverted index
+# (dimension -> rows with weight on it), which visits only those rows and, unlike hashing or
+# LSH, can't miss a neighbour or invent one. This is built once per JD, so scoring a resume is
+# just a set lookup per requirement.
+#
+# Benchmark against the default substring matching, and check every skill against the
+# implication table, with: python semantic_skills.py
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for this optional mode
+    np = None
+
+# Taxonomy skills each skill directly implies, so "PostgreSQL" satisfies "SQL" and "Django"
+# satisfies "Python" while "Java" and "JavaScript" stay apart. Only list what the skill
+# demonstrates, never a shared category or a substitute: Google Cloud doesn't satisfy AWS,
+# and React doesn't satisfy React Native. Implications are followed transitively.
+skill_implies = {
+    'typescript': ('javascript',),
+    'react': ('javascript',),
+    'angular': ('typescript',),
+    'vue.js': ('javascript',),
+    'node.js': ('javascript',),
+    'react native': ('react',),
+    'mysql': ('sql',),
+    'postgresql': ('sql',),
+    'oracle': ('sql',),
+    'django': ('python',),
+    'flask': ('python',),
+    'spring boot': ('java',),
+    'asp.net': ('c#',),
+}
+
+def implied_skills(skill):
+    # Everything the skill implies, following chains
+    found, stack = set(), list(skill_implies.get(skill, ()))
+    while stack:
+        implied = stack.pop()
+        if implied not in found:
+            found.add(implied)
+            stack.extend(skill_implies.get(implied, ()))
+    return found
+
+class SkillMatcher:
+    def __init__(self, skills):
+        if np is None:
+            raise ImportError("Semantic skill matching needs numpy (pip install numpy)")
+        self.skills = [s.lower() for s in skills]
+        self.dims = {skill: i for i, skill in enumerate(self.skills)}
+        unknown = {implied for skill in self.skills for implied in implied_skills(skill)} - set(self.dims)
+        if unknown:
+            raise ValueError(f"Implied skills missing from the taxonomy: {', '.join(sorted(unknown))}")
+
+        vectors = np.zeros((len(self.skills), len(self.skills)), dtype=np.float32)
+        for row, skill in enumerate(self.skills):
+            for implied in {skill} | implied_skills(skill):
+                vectors[row, self.dims[implied]] = 1.0
+        self.vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float16)
+        self.index = [np.flatnonzero(self.vectors[:, dim]).tolist() for dim in range(len(self.skills))]
+
+    def query_vector(self, query):
+        vec = np.zeros(len(self.skills), dtype=np.float16)
+        vec[self.dims[query.lower()]] = 1.0
+        return vec
+
+    def nearest(self, query):
+        # Taxonomy skills that satisfy the requirement: itself and every skill implying it.
+        # A requirement outside the taxonomy is only met by itself.
+        query = query.lower()
+        if query not in self.dims:
+            return {query}
+        q = self.query_vector(query)
+        rows = self.index[self.dims[query]]
+        sims = self.vectors[rows] @ q
+        return {self.skills[row] for row, sim in zip(rows, sims) if sim > 0}
+
+    def exact_nearest(self, query):
+        # Same answer from a full scan of the matrix, for checking the index
+        query = query.lower()
+        if query not in self.dims:
+            return {query}
+        sims = self.vectors @ self.query_vector(query)
+        return {self.skills[row] for row in np.flatnonzero(sims > 0)}
+
+    def expand_requirements(self, job_skills):
+        # For each JD requirement, the set of taxonomy skills that satisfy it
+        return [self.nearest(js) for js in job_skills]
+
+    def check(self):
+        # Runs nearest() on every taxonomy skill; returns (skill, expected, got) for each mismatch
+        # with the implication table or the full scan
+        mismatches = []
+        for skill in self.skills:
+            expected = {other for other in self.skills if other == skill or skill in implied_skills(other)}
+            got = self.nearest(skill)
+            if got != expected or self.exact_nearest(skill) != expected:
+                mismatches.append((skill, expected, got))
+        return mismatches
+
+def benchmark(n_resumes=20000):
+    from resume_batch import common_technical_skills, parse_job_description, parse_resume, score_resume
+    import random
+
+    random.seed(0)
+    job_desc = "Backend engineer: 4+ years, Python, SQL, Docker, AWS. BS in CS. Teamwork and communication."
+    resumes = [parse_resume(f"Skills: {', '.join(random.sample(common_technical_skills, 4))}\n"
+                            f"{random.randint(0, 10)} years experience, {random.choice(['BS', 'MS', 'PhD', 'BA'])}")
+               for _ in range(n_resumes)]
+    job_must_haves, weights = parse_job_description(job_desc)
+
+    t0 = time.perf_counter()
+    for resume_data in resumes:
+        score_resume(resume_data, job_must_haves, weights)
+    string_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matcher = SkillMatcher(common_technical_skills)
+    semantic_must_haves = dict(job_must_haves, skill_sets=matcher.expand_requirements(job_must_haves['skills']))
+    build_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for resume_data in resumes:
+        score_resume(resume_data, semantic_must_haves, weights)
+    semantic_time = time.perf_counter() - t0
+
+    mismatches = matcher.check()
+    for skill, expected, got in mismatches:
+        print(f"  MISMATCH {skill}: expected {sorted(expected)}, got {sorted(got)}")
+    print(f"Checked nearest() on all {len(matcher.skills)} taxonomy skills: {len(mismatches)} mismatches")
+    print(f"Scored {n_resumes} parsed resumes")
+    print(f"  string matching:   {string_time * 1e6 / n_resumes:.2f} us/resume")
+    print(f"  semantic matching: {semantic_time * 1e6 / n_resumes:.2f} us/resume "
+          f"(+ {build_time * 1e3:.1f} ms one-off index build)")
+    for js, accepted in zip(job_must_haves['skills'], semantic_must_haves['skill_sets']):
+        print(f"  {js}: {', '.join(sorted(accepted))}")
+    if mismatches:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)